@@ -25,16 +25,22 @@
 
 import os
 import sys
-import botocore.credentials
-import botocore.session
+import json
+import copy
+import functools
+import itertools
 from botocore.exceptions import BotoCoreError
-import boto3
 import time
+import random
+import threading
 import fnmatch
-from collections import namedtuple
-from inspect import currentframe, getframeinfo
+import re
+from collections import deque, namedtuple, OrderedDict
 from urllib.parse import urlparse
 
+# boto3, asyncio and concurrent.futures are imported on demand,
+# commands not using them (e.g. help) start faster
+
 __author__ = 'Andrea Bonomi <andrea.bonomi@gmail.com>'
 __version__ = '1.1.2'
 __all__ = [
@@ -53,11 +59,28 @@ __all__ = [
     'Crawler',
     'Job',
     'run_crawler',
+    'run_crawler_async',
+    'run_crawlers_async',
+    'run_crawlers',
+    'get_crawlers_states',
     'list_crawlers',
+    'iter_crawlers',
+    'iter_crawlers_async',
     'run_job',
+    'run_job_async',
+    'run_jobs_async',
+    'run_jobs',
     'list_jobs',
+    'iter_jobs',
+    'iter_jobs_async',
     'list_runs',
+    'iter_runs',
+    'list_all_runs',
     'list_partitions',
+    'list_tables',
+    'iter_tables',
+    'get_table',
+    'invalidate_table_cache',
     'add_partition',
     'add_partitions_by_location',
     'delete_partition',
@@ -81,11 +104,170 @@ def hours(x):
 DEFAULT_CRAWLER_DELAY = seconds(10)
 DEFAULT_CRAWLER_TIMEOUT = minutes(10)
 DEFAULT_JOB_DELAY = seconds(10)
-
+DEFAULT_MIN_DELAY = seconds(0.5)
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_MAX_PARALLEL = 10  # max concurrent job runs/crawlers started by run_jobs/run_crawlers
+MAX_WAIT_TIME_SECONDS = seconds(20)  # SQS long polling maximum wait time
+MAX_UNCLAIMED_EVENTS = 1000  # job run completion events kept for the waiters not yet registered
+MAX_JOB_RUNS_PAGE_SIZE = 200  # get_job_runs maximum MaxResults
+MAX_BATCH_GET_JOBS = 25  # batch_get_jobs maximum number of jobs
+MAX_BATCH_GET_CRAWLERS = 100  # batch_get_crawlers maximum number of crawlers
+MAX_BATCH_CREATE_PARTITIONS = 100  # batch_create_partition maximum number of partitions
+MAX_SEARCH_TABLES_PAGE_SIZE = 1000  # search_tables maximum MaxResults
+TABLE_CACHE_TTL = seconds(60)  # Glue tables metadata cache duration
+MAX_LIST_PAGE_SIZE = 1000  # get_jobs/list_jobs/get_crawlers/list_crawlers maximum MaxResults
+
+STARTING = 'STARTING'
 SUCCEEDED = 'SUCCEEDED'
 FAILED = 'FAILED'
+STOPPED = 'STOPPED'
+TIMEOUT = 'TIMEOUT'
+ERROR = 'ERROR'
+EXPIRED = 'EXPIRED'
+TERMINAL_STATES = frozenset((SUCCEEDED, FAILED, STOPPED, TIMEOUT, ERROR, EXPIRED))
+
+
+class Backoff(object):
+    """
+    Sleep between the polls with exponential backoff and decorrelated jitter,
+    starting from min_delay up to max_delay.
+    Raise the exception when the timeout is expired.
+    """
+
+    def __init__(self, timeout, min_delay, max_delay, exception):
+        self.deadline = time.monotonic() + timeout
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.exception = exception
+        self.delay = min_delay
+
+    def remaining(self):
+        "Return the number of seconds until the timeout"
+        return self.deadline - time.monotonic()
+
+    def reset(self):
+        "Restart from min_delay (e.g. after a state change)"
+        self.delay = self.min_delay
+
+    def next_delay(self):
+        "Return the number of seconds to sleep before the next poll"
+        if time.monotonic() > self.deadline:
+            raise self.exception()
+        # decorrelated jitter, the concurrent pollers don't synchronize (even at max_delay)
+        self.delay = min(self.max_delay, random.uniform(self.min_delay, self.delay * 3))
+        return self.delay
+
+    def sleep(self):
+        "Sleep until the next poll"
+        time.sleep(self.next_delay())
+
+    async def sleep_async(self):
+        "Coroutine version of sleep"
+        import asyncio
+
+        await asyncio.sleep(self.next_delay())
+
 
-TIME_LABELS = (('s', 1), ('m', minutes(1)), ('h', hours(1)), ('d', hours(24)))
+class RateLimiter(object):
+    """
+    Token bucket rate limiter, shared by all the threads:
+    allow up to rate calls per second, in bursts of up to burst calls
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self.tokens = self.burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        "Take a token, sleeping until it is available"
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            # the token is reserved now, the tokens go negative while the callers are waiting
+            self.tokens -= 1
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+def wait_for_state(get_state, done, backoff, last_state=None):
+    """
+    Poll get_state until done(state) is true, sleeping with backoff between the polls
+    (the backoff is restarted at each state change). Return the last state.
+    If the last state is known, the first poll is delayed.
+    """
+    if last_state is not None:
+        backoff.sleep()
+    while True:
+        # Check the state before sleeping
+        state = get_state()
+        if done(state):
+            return state
+        if state != last_state:
+            backoff.reset()
+            last_state = state
+        backoff.sleep()
+
+
+async def wait_for_state_async(get_state, done, backoff, last_state=None):
+    """
+    Coroutine version of wait_for_state, get_state is executed in the loop's default executor
+    The timeout is also enforced by the event loop, e.g. while a Glue API call is hanging.
+    """
+    import asyncio
+
+    async def poll(last_state):
+        loop = asyncio.get_event_loop()
+        if last_state is not None:
+            await backoff.sleep_async()
+        while True:
+            # Check the state before sleeping
+            state = await loop.run_in_executor(None, get_state)
+            if done(state):
+                return state
+            if state != last_state:
+                backoff.reset()
+                last_state = state
+            await backoff.sleep_async()
+
+    try:
+        return await asyncio.wait_for(poll(last_state), timeout=max(0, backoff.remaining()))
+    except asyncio.TimeoutError:
+        raise backoff.exception()
+
+
+def run_coroutine(coro):
+    "Run a coroutine in a new event loop, return the result"
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def iter_async(iterable):
+    """
+    Asynchronously yield the items of a blocking iterable,
+    fetching the next item in the executor while the current one is processed
+    """
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    it = iter(iterable)
+    end = object()
+    future = loop.run_in_executor(None, next, it, end)
+    while True:
+        item = await future
+        if item is end:
+            return
+        future = loop.run_in_executor(None, next, it, end)
+        yield item
 
 
 def format_time(seconds=0):
@@ -97,26 +279,12 @@ def format_time(seconds=0):
      :return:             the formatted temporal interval
      :rtype:              str
     """
-    negative = seconds < 0
-    seconds = abs(seconds)
-    empty = True
-    cut = -1
-    result = []
-    for i in range(len(TIME_LABELS) - 1, -1, -1):
-        if i == cut:
-            break
-        interval = TIME_LABELS[i][1]
-        a = seconds // interval
-        if a > 0 or (i == 0 and empty):
-            if negative:
-                part = '-' + str(int(a))
-            else:
-                part = str(int(a))
-            part = part + TIME_LABELS[i][0]
-            result.append(part)
-            seconds -= a * interval
-            empty = False
-    return " ".join(result)
+    sign = '-' if seconds < 0 else ''
+    m, s = divmod(int(abs(seconds)), 60)
+    h, m = divmod(m, 60)
+    d, h = divmod(h, 24)
+    result = [sign + str(v) + label for v, label in ((d, 'd'), (h, 'h'), (m, 'm'), (s, 's')) if v]
+    return ' '.join(result) or sign + '0s'
 
 
 class GluettalaxException(Exception):
@@ -167,24 +335,110 @@ class GluettalaxCommandNotFound(GluettalaxException):
     "GLUEttalax command not found"
 
 
-def get_glue():
+# Shared boto3 session and Glue client, created on first use
+_session = None
+_session_lock = threading.Lock()
+_glue = None
+_glue_lock = threading.Lock()
+
+
+def create_session():
+    "Create a new boto3 session"
+    # boto3 is imported on demand, commands not calling AWS (e.g. help) start faster
+    import boto3
+    import botocore.credentials
+    import botocore.session
+
     # botocore session cache
     cli_cache = os.path.join(os.path.expanduser('~'), '.aws/cli/cache')
     session = botocore.session.get_session()
     session.get_component('credential_provider').get_provider('assume-role').cache = botocore.credentials.JSONFileCache(
         cli_cache
     )
-    # create boto3 client from session
-    if 'AWS_REGION' in os.environ:
-        return boto3.Session(botocore_session=session).client('glue', os.environ['AWS_REGION'])
-    else:
-        return boto3.Session(botocore_session=session).client('glue')
+    return boto3.Session(botocore_session=session)
+
+
+def get_session():
+    "Return the shared boto3 session"
+    global _session
+    # the credentials (e.g. an assumed role) are resolved once for all the clients
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def create_client(service_name, config=None):
+    "Create a new boto3 client"
+    session = get_session()
+    # boto3 sessions are not thread safe: the clients are created one at a time
+    with _session_lock:
+        if 'AWS_REGION' in os.environ:
+            return session.client(service_name, os.environ['AWS_REGION'], config=config)
+        else:
+            return session.client(service_name, config=config)
+
+
+def create_glue():
+    "Create a new Glue client"
+    import botocore.config
+
+    # adaptive retry mode retries the transient errors (throttling, connection errors)
+    # and rate limits the client when Glue starts throttling,
+    # TCP keepalive keeps the pooled connections open between the polls
+    config = botocore.config.Config(
+        # botocore is the only retry layer: a poll failing after the last attempt fails the whole wait
+        retries={'mode': 'adaptive', 'max_attempts': 10},
+        connect_timeout=5,
+        read_timeout=15,
+        max_pool_connections=32,
+        tcp_keepalive=True,
+    )
+    glue = create_client('glue', config=config)
+    # optional process wide limit of the Glue API calls per second, for the large fan outs
+    max_qps = os.environ.get('GLUE_MAX_QPS')
+    if max_qps:
+        try:
+            rate = float(max_qps)
+        except ValueError:
+            rate = 0
+        if not rate > 0:  # not positive, NaN
+            raise GluettalaxException('invalid GLUE_MAX_QPS: {} (expected a positive number)'.format(max_qps))
+        limiter = RateLimiter(rate)
+        glue.meta.events.register('before-send.glue', lambda **kargs: limiter.acquire())
+    return glue
+
+
+def get_glue():
+    "Return the shared Glue client"
+    global _glue
+    # boto3 clients are thread safe, but creating them is not:
+    # the client is created once and shared by all the threads
+    # (the adaptive retry rate limiter is shared too)
+    if _glue is None:
+        with _glue_lock:
+            if _glue is None:
+                _glue = create_glue()
+    return _glue
 
 
 class Crawler(object):
-    def __init__(self, name, delay=DEFAULT_CRAWLER_DELAY, timeout=DEFAULT_CRAWLER_TIMEOUT, op_async=False):
+    def __init__(
+        self,
+        name,
+        delay=DEFAULT_CRAWLER_DELAY,
+        timeout=DEFAULT_CRAWLER_TIMEOUT,
+        op_async=False,
+        min_delay=DEFAULT_MIN_DELAY,
+    ):
+        """
+        The crawler state is polled every min_delay seconds,
+        increasing the interval after each poll up to delay seconds
+        """
         self.name = name
         self.delay = delay
+        self.min_delay = min_delay
         self.timeout = timeout
         self.op_async = op_async
         self.glue = get_glue()
@@ -202,156 +456,734 @@ class Crawler(object):
         "Return true if the craweler is in READY state"
         return self.status['State'] == 'READY'
 
+    def start(self):
+        "Start the crawler"
+        try:
+            self.glue.start_crawler(Name=self.name)
+        except self.glue.exceptions.EntityNotFoundException:
+            raise CrawlerNotFound('Crawler {} not found'.format(self.name))
+        except self.glue.exceptions.CrawlerRunningException:
+            # already started, e.g. by a request retried by botocore after a read timeout
+            pass
+
     def run(self, rerun=False):
         """
         Start the crawler
         If the crawler is already running, restart the crawler only if rerun is True
         """
+        # the status is fetched once, after wait the crawler is already known to be READY
         if rerun:
-            start_time = time.time()
-            while not self.is_ready:
-                if time.time() > start_time + self.timeout:
-                    raise CrawlerTimeout()
-                time.sleep(self.delay)
-        if self.is_ready:
-            self.glue.start_crawler(Name=self.name)
+            self.wait()
+            state = 'READY'
+        else:
+            state = self.status['State']
+        if state == 'READY':
+            self.start()
+            state = 'RUNNING'
         if self.op_async:
             return
-        start_time = time.time()
-        while not self.is_ready:
-            if time.time() > start_time + self.timeout:
-                raise CrawlerTimeout()
-            time.sleep(self.delay)
+        # the state is already known, skip the first poll
+        self.wait(last_state=state)
+
+    async def run_async(self, rerun=False):
+        "Coroutine version of run, the Glue API calls are executed in the loop's default executor"
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        if rerun:
+            await self.wait_async()
+            state = 'READY'
+        else:
+            state = (await loop.run_in_executor(None, lambda: self.status))['State']
+        if state == 'READY':
+            await loop.run_in_executor(None, self.start)
+            state = 'RUNNING'
+        if self.op_async:
+            return
+        await self.wait_async(last_state=state)
+
+    def wait(self, last_state=None):
+        """
+        Wait until the crawler is in READY state
+        If last_state is known, the first poll is delayed
+        """
+        backoff = Backoff(self.timeout, self.min_delay, self.delay, CrawlerTimeout)
+        wait_for_state(lambda: self.status['State'], lambda state: state == 'READY', backoff, last_state)
+
+    async def wait_async(self, last_state=None):
+        "Coroutine version of wait"
+        backoff = Backoff(self.timeout, self.min_delay, self.delay, CrawlerTimeout)
+        await wait_for_state_async(lambda: self.status['State'], lambda state: state == 'READY', backoff, last_state)
+
+
+@functools.lru_cache(maxsize=128)
+def get_job_timeout(name):
+    "Return the job timeout in minutes, cached"
+    glue = get_glue()
+    try:
+        return glue.get_job(JobName=name)['Job']['Timeout']
+    except glue.exceptions.EntityNotFoundException:
+        raise JobNotFound('Job {} not found'.format(name))
+
+
+class JobEventsReceiver(object):
+    """
+    Receive the "Glue Job State Change" events from an SQS queue
+    and route the job runs completions to the waiters (threads or coroutines).
+    The messages are received by a dedicated thread, running while there are waiters,
+    and deleted from the queue, so the queue must have a single consumer
+    (one receiver per queue in the process).
+    """
+
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self.sqs = create_client('sqs')
+        self.lock = threading.Lock()
+        self.thread = None
+        # callbacks by (job name, job run id)
+        self.waiters = {}
+        # terminal states by (job name, job run id), waiting to be claimed
+        self.states = OrderedDict()
+
+    def subscribe(self, key, callback):
+        """
+        Call callback(state, error) when the job run is completed
+        (from the receiver thread, or immediately if the event was already received)
+        """
+        with self.lock:
+            if key not in self.states:
+                self.waiters.setdefault(key, []).append(callback)
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, daemon=True)
+                    self.thread.start()
+                return
+            state = self.states.pop(key)
+        callback(state, None)
+
+    def unsubscribe(self, key, callback):
+        "Remove a callback (e.g. after a timeout)"
+        with self.lock:
+            callbacks = self.waiters.get(key, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.waiters.pop(key, None)
+
+    def wait(self, name, job_run_id, timeout):
+        "Wait for the completion of a job run, return the job run state"
+        key = (name, job_run_id)
+        event = threading.Event()
+        result = []
+
+        def callback(state, error):
+            result.append((state, error))
+            event.set()
+
+        self.subscribe(key, callback)
+        if not event.wait(timeout):
+            self.unsubscribe(key, callback)
+            raise JobTimeout()
+        state, error = result[0]
+        if error is not None:
+            raise error
+        return state
+
+    async def wait_async(self, name, job_run_id, timeout):
+        "Coroutine version of wait, no executor thread is used while waiting"
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        key = (name, job_run_id)
+        future = loop.create_future()
+
+        def set_result(state, error):
+            if future.done():  # e.g. cancelled by the timeout
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(state)
+
+        def callback(state, error):
+            try:
+                loop.call_soon_threadsafe(set_result, state, error)
+            except RuntimeError:  # the loop is closed
+                pass
+
+        self.subscribe(key, callback)
+        try:
+            return await asyncio.wait_for(future, timeout=max(0, timeout))
+        except asyncio.TimeoutError:
+            raise JobTimeout()
+        finally:
+            self.unsubscribe(key, callback)
+
+    def run(self):
+        "Receive the messages while there are waiters"
+        while True:
+            with self.lock:
+                if not self.waiters:
+                    self.thread = None
+                    return
+            try:
+                self.receive()
+            except Exception as ex:
+                # notify the error to all the waiters
+                with self.lock:
+                    waiters, self.waiters = self.waiters, {}
+                    self.thread = None
+                for callback in itertools.chain.from_iterable(waiters.values()):
+                    callback(None, ex)
+                return
+
+    def receive(self):
+        "Receive and delete a batch of messages, notify the job runs terminal states"
+        response = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            WaitTimeSeconds=MAX_WAIT_TIME_SECONDS,
+            MaxNumberOfMessages=10,
+        )
+        messages = response.get('Messages', [])
+        if not messages:
+            return
+        self.sqs.delete_message_batch(
+            QueueUrl=self.queue_url,
+            Entries=[{'Id': str(i), 'ReceiptHandle': x['ReceiptHandle']} for i, x in enumerate(messages)],
+        )
+        notifications = []
+        with self.lock:
+            for message in messages:
+                detail = json.loads(message['Body']).get('detail', {})
+                if detail.get('state') not in TERMINAL_STATES:
+                    continue
+                key = (detail.get('jobName'), detail.get('jobRunId'))
+                callbacks = self.waiters.pop(key, None)
+                if callbacks:
+                    notifications.extend((callback, detail['state']) for callback in callbacks)
+                else:
+                    self.states[key] = detail['state']
+            # the completion events of the runs nobody is waiting for are eventually discarded
+            while len(self.states) > MAX_UNCLAIMED_EVENTS:
+                self.states.popitem(last=False)
+        for callback, state in notifications:
+            callback(state, None)
+
+
+# Job events receivers by queue URL
+_events_receivers = {}
+_events_receivers_lock = threading.Lock()
+
+
+def get_events_receiver(queue_url):
+    "Return the shared events receiver of a queue"
+    with _events_receivers_lock:
+        if queue_url not in _events_receivers:
+            _events_receivers[queue_url] = JobEventsReceiver(queue_url)
+        return _events_receivers[queue_url]
 
 
 class Job(object):
-    def __init__(self, name, delay=DEFAULT_JOB_DELAY, timeout=None, op_async=False):
+    def __init__(
+        self,
+        name,
+        delay=DEFAULT_JOB_DELAY,
+        timeout=None,
+        op_async=False,
+        min_delay=DEFAULT_MIN_DELAY,
+        queue_url=None,
+    ):
+        """
+        The job run state is polled every min_delay seconds,
+        increasing the interval after each poll up to delay seconds.
+        queue_url is the URL of an optional SQS queue receiving the
+        "Glue Job State Change" events from an EventBridge rule.
+        If the queue is defined, the job run completion is notified
+        by the events instead of polling the job run state.
+        The queue must not be shared with other consumers (see JobEventsReceiver).
+        """
         self.name = name
         self.delay = delay
+        self.min_delay = min_delay
         self.timeout = timeout
         self.op_async = op_async
-        self.glue = boto3.client('glue')
-        try:
-            job = self.glue.get_job(JobName=self.name)['Job']
-        except self.glue.exceptions.EntityNotFoundException:
-            raise JobNotFound('Job {} not found'.format(self.name))
+        self.queue_url = queue_url
+        self.glue = get_glue()
         if self.timeout is None:
-            self.timeout = minutes(job['Timeout'])
+            self.timeout = minutes(get_job_timeout(self.name))
 
-    def get_runs(self):
+    def get_runs(self, since=None, max_items=None):
+        """
+        Iterate over the job runs, fetching the pages as needed
+        If since is defined, stop at the first run started before since
+        """
+        return iter_runs(self.name, lines=max_items, since=since)
+
+    def get_run(self, job_run_id):
+        "Return the job run details"
         try:
-            return list_runs(self.name)
+            return self.glue.get_job_run(JobName=self.name, RunId=job_run_id)['JobRun']
         except self.glue.exceptions.EntityNotFoundException:
             raise JobNotFound('Job {} not found'.format(self.name))
 
     def get_run_state(self, job_run_id):
-        try:
-            return self.glue.get_job_run(JobName=self.name, RunId=job_run_id)['JobRun']['JobRunState']
-        except self.glue.exceptions.EntityNotFoundException:
-            raise JobNotFound('Job {} not found'.format(self.name))
+        return self.get_run(job_run_id)['JobRunState']
 
-    def run(self, **kargs):
-        arguments = dict([('--' + k, v) for k, v in kargs.items()])
+    def start(self, **kargs):
+        "Start a job run, return the job run id"
+        arguments = {'--' + k: v for k, v in kargs.items()}
+        timeout_minutes = max(1, int(self.timeout // 60))  # Glue job run minimum timeout is 1 minute
         try:
-            result = self.glue.start_job_run(JobName=self.name, Timeout=int(self.timeout / 60), Arguments=arguments)
+            result = self.glue.start_job_run(JobName=self.name, Timeout=timeout_minutes, Arguments=arguments)
         except self.glue.exceptions.EntityNotFoundException:
             raise JobNotFound('Job {} not found'.format(self.name))
         except self.glue.exceptions.ConcurrentRunsExceededException as ex:
             raise JobConcurrentRunsExceeded(ex.message)
-        job_run_id = result['JobRunId']
-        start_time = time.time()
-        run_state = self.get_run_state(job_run_id)
+        return result['JobRunId']
+
+    def run(self, **kargs):
+        job_run_id = self.start(**kargs)
         if self.op_async:
             return True
-        while run_state not in [SUCCEEDED, FAILED]:
-            if time.time() > start_time + self.timeout:
-                raise JobTimeout()
-            time.sleep(self.delay)
-            run_state = self.get_run_state(job_run_id)
-        return run_state == SUCCEEDED
+        if self.queue_url:
+            return self.wait_events(job_run_id)
+        # a new job run is STARTING, skip the first poll
+        return self.wait(job_run_id, last_state=STARTING)
+
+    async def run_async(self, **kargs):
+        "Coroutine version of run, the Glue API calls are executed in the loop's default executor"
+        import asyncio
 
+        loop = asyncio.get_event_loop()
+        job_run_id = await loop.run_in_executor(None, functools.partial(self.start, **kargs))
+        if self.op_async:
+            return True
+        if self.queue_url:
+            return await self.wait_events_async(job_run_id)
+        # a new job run is STARTING, skip the first poll
+        return await self.wait_async(job_run_id, last_state=STARTING)
 
-def run_crawler(name, rerun=False, delay=DEFAULT_CRAWLER_DELAY, timeout=DEFAULT_CRAWLER_TIMEOUT, op_async=False):
+    def wait(self, job_run_id, last_state=None):
+        """
+        Wait until the job run is completed, return true if the job run succeeded
+        If the last state of the job run is known, the first poll is delayed
+        """
+        backoff = Backoff(self.timeout, self.min_delay, self.delay, JobTimeout)
+        get_state = functools.partial(self.get_run_state, job_run_id)
+        state = wait_for_state(get_state, lambda state: state in TERMINAL_STATES, backoff, last_state)
+        return state == SUCCEEDED
+
+    async def wait_async(self, job_run_id, last_state=None):
+        "Coroutine version of wait"
+        backoff = Backoff(self.timeout, self.min_delay, self.delay, JobTimeout)
+        get_state = functools.partial(self.get_run_state, job_run_id)
+        state = await wait_for_state_async(get_state, lambda state: state in TERMINAL_STATES, backoff, last_state)
+        return state == SUCCEEDED
+
+    def wait_events(self, job_run_id):
+        "Wait for the job run completion event on the SQS queue, return true if the job run succeeded"
+        state = get_events_receiver(self.queue_url).wait(self.name, job_run_id, self.timeout)
+        return state == SUCCEEDED
+
+    async def wait_events_async(self, job_run_id):
+        "Coroutine version of wait_events, the events are received by the queue's receiver thread"
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        receiver = await loop.run_in_executor(None, get_events_receiver, self.queue_url)
+        state = await receiver.wait_async(self.name, job_run_id, self.timeout)
+        return state == SUCCEEDED
+
+
+def run_crawler(
+    name,
+    rerun=False,
+    delay=DEFAULT_CRAWLER_DELAY,
+    timeout=DEFAULT_CRAWLER_TIMEOUT,
+    op_async=False,
+    min_delay=DEFAULT_MIN_DELAY,
+):
+    timeout = int(timeout)
+    return Crawler(name=name, delay=delay, timeout=timeout, op_async=op_async, min_delay=min_delay).run(rerun=rerun)
+
+
+async def run_crawler_async(
+    name,
+    rerun=False,
+    delay=DEFAULT_CRAWLER_DELAY,
+    timeout=DEFAULT_CRAWLER_TIMEOUT,
+    op_async=False,
+    min_delay=DEFAULT_MIN_DELAY,
+):
+    "Coroutine version of run_crawler"
     timeout = int(timeout)
-    return Crawler(name=name, delay=delay, timeout=timeout, op_async=op_async).run()
+    crawler = Crawler(name=name, delay=delay, timeout=timeout, op_async=op_async, min_delay=min_delay)
+    return await crawler.run_async(rerun=rerun)
+
+
+async def run_crawlers_async(
+    names,
+    rerun=False,
+    delay=DEFAULT_CRAWLER_DELAY,
+    timeout=DEFAULT_CRAWLER_TIMEOUT,
+    op_async=False,
+    min_delay=DEFAULT_MIN_DELAY,
+    max_parallel=DEFAULT_MAX_PARALLEL,
+):
+    """
+    Run many crawlers concurrently, up to max_parallel crawlers at a time:
+    a crawler is started when another one is READY again.
+    The running crawlers states are polled together with batch_get_crawlers.
+    If op_async, return after starting the last crawlers, without waiting for them.
+    """
+    import asyncio
+
+    timeout = int(timeout)
+    pending = deque(names)
+    running = []
+    backoff = Backoff(timeout, min_delay, delay, CrawlerTimeout)
+
+    async def start(name):
+        await run_crawler_async(name, rerun=rerun, delay=delay, timeout=timeout, op_async=True, min_delay=min_delay)
+
+    async def run_all():
+        loop = asyncio.get_event_loop()
+        while True:
+            # start the crawlers in the free slots
+            starting = [pending.popleft() for _ in range(min(len(pending), max_parallel - len(running)))]
+            await asyncio.gather(*[start(name) for name in starting])
+            running.extend(starting)
+            if not running or (op_async and not pending):
+                return
+            await backoff.sleep_async()
+            states = await loop.run_in_executor(None, get_crawlers_states, list(running))
+            if any(states.get(name) == 'READY' for name in running):
+                running[:] = [name for name in running if states.get(name) != 'READY']
+                backoff.reset()
+
+    try:
+        await asyncio.wait_for(run_all(), timeout=max(0, backoff.remaining()))
+    except asyncio.TimeoutError:
+        raise CrawlerTimeout()
 
 
-def list_crawlers(full=False):
+def run_crawlers(names, **kargs):
+    "Run many crawlers concurrently, see run_crawlers_async"
+    return run_coroutine(run_crawlers_async(names, **kargs))
+
+
+def get_crawlers_states(names):
+    "Return the states of many crawlers (crawler name -> state)"
     glue = get_glue()
-    paginator = glue.get_paginator('get_crawlers')
-    pages = paginator.paginate()
-    crawlers = []
-    for page in pages:
-        for crawler in page['Crawlers']:
-            crawlers.append(crawler if full else crawler['Name'])
-    return crawlers
+    states = {}
+    for i in range(0, len(names), MAX_BATCH_GET_CRAWLERS):
+        response = glue.batch_get_crawlers(CrawlerNames=names[i : i + MAX_BATCH_GET_CRAWLERS])
+        if response.get('CrawlersNotFound'):
+            raise CrawlerNotFound('Crawler {} not found'.format(response['CrawlersNotFound'][0]))
+        states.update((crawler['Name'], crawler['State']) for crawler in response['Crawlers'])
+    return states
+
+
+def has_wildcards(pattern):
+    "Return true if the pattern contains shell-style wildcards"
+    return any(c in pattern for c in '*?[')
+
+
+def compile_pattern(pattern):
+    "Return a function checking if a name matches the shell-style pattern (all names if the pattern is empty)"
+    if not pattern:
+        return lambda name: True
+    match = re.compile(fnmatch.translate(pattern)).match
+    return lambda name: match(name) is not None
 
 
-def run_job(name, delay=DEFAULT_JOB_DELAY, timeout=None, op_async=False, **kargs):
-    return Job(name=name, delay=delay, timeout=timeout, op_async=op_async).run(**kargs)
+def page_config(limit=None):
+    "Return the PaginationConfig for fetching up to limit items with the fewest calls"
+    return {'MaxItems': limit, 'PageSize': min(limit or MAX_LIST_PAGE_SIZE, MAX_LIST_PAGE_SIZE)}
 
 
-def list_jobs(full=False):
+def iter_crawlers(full=False, limit=None, pattern=None):
+    """
+    Yield the Glue crawlers names (or definitions, if full is true)
+    matching the optional pattern, up to limit crawlers, fetching the pages on demand
+    """
     glue = get_glue()
-    paginator = glue.get_paginator('get_jobs')
-    pages = paginator.paginate()
-    jobs = []
-    for page in pages:
-        for job in page['Jobs']:
-            jobs.append(job if full else job['Name'])
-    return jobs
+    if pattern and not has_wildcards(pattern):
+        # a single crawler, fetch it by name
+        crawlers = glue.batch_get_crawlers(CrawlerNames=[pattern])['Crawlers']
+        yield from (crawlers if full else (crawler['Name'] for crawler in crawlers))
+        return
+    if full and not pattern:
+        # stop fetching pages after limit items
+        pages = glue.get_paginator('get_crawlers').paginate(PaginationConfig=page_config(limit))
+        yield from pages.search('Crawlers[]')
+        return
+    # list_crawlers returns only the names, without the crawlers definitions
+    names = itertools.islice(iter_crawlers_names(pattern), limit)
+    if not full:
+        yield from names
+        return
+    # fetch the definitions of the matching crawlers only
+    while True:
+        batch = list(itertools.islice(names, MAX_BATCH_GET_CRAWLERS))
+        if not batch:
+            return
+        crawlers = {x['Name']: x for x in glue.batch_get_crawlers(CrawlerNames=batch)['Crawlers']}
+        yield from (crawlers[name] for name in batch if name in crawlers)
 
 
-def list_runs(name, lines=None, include_succeeded=True):
+def iter_crawlers_names(pattern=None):
+    "Yield the Glue crawlers names matching the optional pattern"
+    glue = get_glue()
+    match = compile_pattern(pattern)
+    kargs = {'MaxResults': MAX_LIST_PAGE_SIZE}
+    while True:  # list_crawlers can't be paginated by botocore
+        response = glue.list_crawlers(**kargs)
+        yield from filter(match, response['CrawlerNames'])
+        if not response.get('NextToken'):
+            return
+        kargs['NextToken'] = response['NextToken']
+
+
+def list_crawlers(full=False, limit=None, pattern=None):
+    return list(iter_crawlers(full=full, limit=limit, pattern=pattern))
+
+
+async def iter_crawlers_async(full=False, limit=None, pattern=None):
+    "Asynchronously yield the Glue crawlers names (or definitions), see iter_crawlers"
+    async for crawler in iter_async(iter_crawlers(full=full, limit=limit, pattern=pattern)):
+        yield crawler
+
+
+def run_job(
+    name,
+    delay=DEFAULT_JOB_DELAY,
+    timeout=None,
+    op_async=False,
+    min_delay=DEFAULT_MIN_DELAY,
+    queue_url=None,
+    **kargs,
+):
+    return Job(
+        name=name,
+        delay=delay,
+        timeout=timeout,
+        op_async=op_async,
+        min_delay=min_delay,
+        queue_url=queue_url,
+    ).run(**kargs)
+
+
+async def run_job_async(
+    name,
+    delay=DEFAULT_JOB_DELAY,
+    timeout=None,
+    op_async=False,
+    min_delay=DEFAULT_MIN_DELAY,
+    queue_url=None,
+    **kargs,
+):
+    "Coroutine version of run_job"
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    job = await loop.run_in_executor(
+        None,
+        functools.partial(
+            Job,
+            name=name,
+            delay=delay,
+            timeout=timeout,
+            op_async=op_async,
+            min_delay=min_delay,
+            queue_url=queue_url,
+        ),
+    )
+    return await job.run_async(**kargs)
+
+
+async def run_jobs_async(names, max_parallel=DEFAULT_MAX_PARALLEL, **kargs):
+    "Run many Glue jobs concurrently (up to max_parallel at a time), return the list of the results"
+    import asyncio
+
+    semaphore = asyncio.Semaphore(max_parallel)
+
+    async def run(name):
+        async with semaphore:
+            return await run_job_async(name, **kargs)
+
+    if hasattr(names, '__aiter__'):
+        # start the runs as the names arrive (e.g. from iter_jobs_async)
+        tasks = [asyncio.ensure_future(run(name)) async for name in names]
+    else:
+        tasks = [run(name) for name in names]
+    return await asyncio.gather(*tasks)
+
+
+def run_jobs(names, max_parallel=DEFAULT_MAX_PARALLEL, **kargs):
+    "Run many Glue jobs concurrently (up to max_parallel at a time), return the list of the results"
+    return run_coroutine(run_jobs_async(names, max_parallel=max_parallel, **kargs))
+
+
+def iter_jobs(full=False, limit=None, pattern=None):
+    """
+    Yield the Glue jobs names (or definitions, if full is true)
+    matching the optional pattern, up to limit jobs, fetching the pages on demand
+    """
     glue = get_glue()
+    if pattern and not has_wildcards(pattern):
+        # a single job, fetch it by name
+        jobs = glue.batch_get_jobs(JobNames=[pattern])['Jobs']
+        yield from (jobs if full else (job['Name'] for job in jobs))
+        return
+    if full and not pattern:
+        # stop fetching pages after limit items
+        pages = glue.get_paginator('get_jobs').paginate(PaginationConfig=page_config(limit))
+        yield from pages.search('Jobs[]')
+        return
+    # list_jobs returns only the names, without the jobs definitions
+    pages = glue.get_paginator('list_jobs').paginate(PaginationConfig=page_config(None if pattern else limit))
+    names = pages.search('JobNames[]')
+    if pattern:
+        names = filter(compile_pattern(pattern), names)
+    names = itertools.islice(names, limit)
+    if not full:
+        yield from names
+        return
+    # fetch the definitions of the matching jobs only
+    while True:
+        batch = list(itertools.islice(names, MAX_BATCH_GET_JOBS))
+        if not batch:
+            return
+        jobs = {job['Name']: job for job in glue.batch_get_jobs(JobNames=batch)['Jobs']}
+        yield from (jobs[name] for name in batch if name in jobs)
+
+
+def list_jobs(full=False, limit=None, pattern=None):
+    return list(iter_jobs(full=full, limit=limit, pattern=pattern))
+
+
+async def iter_jobs_async(full=False, limit=None, pattern=None):
+    "Asynchronously yield the Glue jobs names (or definitions), see iter_jobs"
+    async for job in iter_async(iter_jobs(full=full, limit=limit, pattern=pattern)):
+        yield job
+
+
+def iter_runs(name, lines=None, include_succeeded=True, since=None):
+    """
+    Yield the runs of a job (newest first), fetching the pages on demand
+
+     :param name:               job name
+     :param lines:              max number of runs
+     :param include_succeeded:  include the succeeded runs
+     :param since:              stop at the first run started before this (timezone aware) datetime
+    """
+    glue = get_glue()
+    lines = int(lines) if lines else None
+    if lines and include_succeeded:
+        # don't fetch more runs than required
+        pagination_config = {'PageSize': min(lines, MAX_JOB_RUNS_PAGE_SIZE), 'MaxItems': lines}
+    else:
+        # the runs are filtered, the number of runs to be fetched is unknown
+        pagination_config = {'PageSize': MAX_JOB_RUNS_PAGE_SIZE}
     try:
         paginator = glue.get_paginator('get_job_runs')
-        pages = paginator.paginate(JobName=name)
-        job_runs = []
-        i = 0
-        if lines:
-            lines = int(lines)
-        for page in pages:
-            for job_run in page['JobRuns']:
-                if not include_succeeded and job_run['JobRunState'] == SUCCEEDED:
-                    continue
-                job_runs.append(job_run)
-                i = i + 1
-                if lines and i >= lines:
-                    break
-            if lines and i >= lines:
-                break
-        return job_runs
+        job_runs = paginator.paginate(JobName=name, PaginationConfig=pagination_config).search('JobRuns[]')
+        if since is not None:
+            # the runs are sorted by start time, stop fetching pages at the first older run
+            job_runs = itertools.takewhile(lambda x: x['StartedOn'] >= since, job_runs)
+        if not include_succeeded:
+            job_runs = (x for x in job_runs if x['JobRunState'] != SUCCEEDED)
+        # stop fetching pages after the requested number of lines
+        yield from itertools.islice(job_runs, lines)
     except glue.exceptions.EntityNotFoundException:
         raise JobNotFound('Job {} not found'.format(name))
 
 
-def print_job_runs(name=None, include_succeeded=True, lines=None, header=True):
-    fmt = '{JobRunState:>10} {AllocatedCapacity:>4} {ExecutionTime:10}  {StartedOn:19}   {JobName} {Arguments}'
-    if header:
-        print(
-            fmt.format(
-                JobRunState='Status',
-                AllocatedCapacity='Cap',
-                ExecutionTime='Exec time',
-                StartedOn='Start time',
-                JobName='Name and arguments',
-                Arguments='',
-            )
+def list_runs(name, lines=None, include_succeeded=True):
+    return list(iter_runs(name, lines=lines, include_succeeded=include_succeeded))
+
+
+def list_all_runs(lines=None, include_succeeded=True):
+    """
+    Fetch the runs of all the jobs concurrently,
+    yield the list of the runs of each job in jobs order
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS) as executor:
+        yield from executor.map(
+            lambda job_name: list_runs(job_name, lines=lines, include_succeeded=include_succeeded),
+            list_jobs(),
+        )
+
+
+# Output formats and headers, rendered once
+HEADER_SEPARATOR = '-' * 70
+JOB_RUN_FMT = '{:>10} {:>4} {:10}  {:19}   {} {}'
+JOB_RUN_HEADER = JOB_RUN_FMT.format('Status', 'Cap', 'Exec time', 'Start time', 'Name and arguments', '')
+CRAWLER_FMT = '{:40} {:10} {}'
+CRAWLER_HEADER = CRAWLER_FMT.format('Name', 'Status', '')
+JOB_FMT = '{:40} {:8}  {:10}'
+JOB_HEADER = JOB_FMT.format('Name', 'Capacity', 'Max concurrent')
+
+
+def print_runs(job_runs):
+    "Print a list of job runs"
+    fmt = JOB_RUN_FMT.format
+    rows = [
+        fmt(
+            run['JobRunState'],
+            run['AllocatedCapacity'],
+            format_time(run['ExecutionTime']),
+            run['StartedOn'].strftime('%Y-%m-%d %H:%M:%S'),
+            run['JobName'],
+            ' '.join(k + ' ' + v for k, v in run['Arguments'].items()),
         )
-        print('-' * 70)
+        for run in job_runs
+    ]
+    if not rows:
+        return
+    try:
+        # write all the rows at once
+        sys.stdout.write('\n'.join(rows) + '\n')
+    except IOError:  # e.g. Broken pipe
+        pass
+
+
+def print_runs_json(job_runs):
+    "Print the job runs as a JSON array, one run at a time"
+    write = sys.stdout.write
+    try:
+        # the opening bracket is written after the first run is fetched,
+        # nothing is printed if the first page fails (e.g. job not found)
+        prefix = '['
+        for run in job_runs:
+            write(prefix)
+            prefix = ',\n'
+            json.dump(run, sys.stdout, default=str)
+        write('[]\n' if prefix == '[' else ']\n')
+    except IOError:  # e.g. Broken pipe
+        pass
+
+
+def print_job_runs(name=None, include_succeeded=True, lines=None, header=True, output_json=False):
+    if output_json:
+        if name is None:
+            job_runs = itertools.chain.from_iterable(
+                list_all_runs(include_succeeded=include_succeeded, lines=lines or 1)
+            )
+        else:
+            job_runs = iter_runs(name, include_succeeded=include_succeeded, lines=lines)
+        print_runs_json(job_runs)
+        return
+    if header:
+        print(JOB_RUN_HEADER)
+        print(HEADER_SEPARATOR)
     if name is None:
-        for job in list_jobs(full=True):
-            print_job_runs(name=job['Name'], include_succeeded=include_succeeded, lines=lines or 1, header=False)
+        for job_runs in list_all_runs(include_succeeded=include_succeeded, lines=lines or 1):
+            print_runs(job_runs)
     else:
-        try:
-            for run in list_runs(name, include_succeeded=include_succeeded, lines=lines):
-                run['ExecutionTime'] = format_time(run['ExecutionTime'])
-                run['StartedOn'] = run['StartedOn'].isoformat(' ').split('.')[0]
-                run['Arguments'] = ' '.join([k + ' ' + v for k, v in run['Arguments'].items()])
-                print(fmt.format(**run))
-        except IOError:  # e.g. Broken pipe
-            pass
+        print_runs(list_runs(name, include_succeeded=include_succeeded, lines=lines))
 
 
 def get_partition_values(kargs, partition_keys):
@@ -359,7 +1191,7 @@ def get_partition_values(kargs, partition_keys):
     if len(kargs) != len(partition_keys):
         raise InvalidOption(
             '{} partitions required ({})'.format(
-                len(partition_keys), ' '.join(['--{}=XXX'.format(x['Name']) for x in partition_keys])
+                len(partition_keys), ' '.join('--{}=XXX'.format(x['Name']) for x in partition_keys)
             )
         )
     try:
@@ -371,14 +1203,38 @@ def get_partition_values(kargs, partition_keys):
 Partitions = namedtuple('Partitions', ['partition_keys', 'max_lengths', 'data'])
 
 
+# Glue tables metadata cache, (timestamp, metadata) by (database, table)
+_tables_cache = {}
+
+
+def get_table(db, table):
+    """
+    Return a copy of the Glue table metadata,
+    cached for TABLE_CACHE_TTL seconds (use invalidate_table_cache to clear the cache)
+    """
+    now = time.monotonic()
+    entry = _tables_cache.get((db, table))
+    if entry is None or now - entry[0] > TABLE_CACHE_TTL:
+        glue = get_glue()
+        try:
+            entry = (now, glue.get_table(DatabaseName=db, Name=table))
+        except glue.exceptions.EntityNotFoundException:
+            raise TableNotFound('Table {} not found'.format(table))
+        _tables_cache[(db, table)] = entry
+    # the callers can modify the result without altering the cache
+    return copy.deepcopy(entry[1])
+
+
+def invalidate_table_cache():
+    "Clear the Glue tables metadata cache"
+    _tables_cache.clear()
+
+
 def list_partitions(db, table, header=True):
     "List Glue partitions"
     # Get table metadata
     glue = get_glue()
-    try:
-        glue_table = glue.get_table(DatabaseName=db, Name=table)
-    except glue.exceptions.EntityNotFoundException:
-        raise TableNotFound('Table {} not found'.format(table))
+    glue_table = get_table(db, table)
     partition_keys = [x['Name'] for x in glue_table['Table']['PartitionKeys']]
     # Get partitions
     data = []
@@ -396,20 +1252,25 @@ def list_partitions(db, table, header=True):
 
 
 def add_partitions_by_location(db, table, location, kargs):
+    from concurrent.futures import ThreadPoolExecutor
+
     glue = get_glue()
-    s3 = boto3.resource('s3')
-    # Get s3 partitions
+    s3 = create_client('s3')
+    # Get s3 partitions (the dirs are collected while the pages are fetched)
     url = urlparse(location)
-    bucket = s3.Bucket(url.netloc)
-    bucket_files = [x.key for x in bucket.objects.filter(Prefix=url.path[1:]).all()]
-    bucket_dirs = sorted(list(set([os.path.dirname(x) for x in bucket_files])))
+    pages = s3.get_paginator('list_objects_v2').paginate(Bucket=url.netloc, Prefix=url.path[1:])
+    bucket_dirs = sorted({key.rpartition('/')[0] for key in pages.search('Contents[].Key') if key})
     # Parsing table info required to create partitions from table
-    glue_table = glue.get_table(DatabaseName=db, Name=table)
+    glue_table = get_table(db, table)
     input_format = glue_table['Table']['StorageDescriptor']['InputFormat']
     output_format = glue_table['Table']['StorageDescriptor']['OutputFormat']
     serde_info = glue_table['Table']['StorageDescriptor']['SerdeInfo']
     partition_keys = glue_table['Table']['PartitionKeys']
+    # Get the existing partitions, only the missing partitions are created
+    pages = glue.get_paginator('get_partitions').paginate(DatabaseName=db, TableName=table)
+    existing = {tuple(values) for values in pages.search('Partitions[].Values') if values is not None}
     # Iterate over dirs
+    partitions = []
     for path in bucket_dirs:
         partition_url = 's3://{}/{}/'.format(url.netloc, path)
         parts = path.split('/')
@@ -417,14 +1278,18 @@ def add_partitions_by_location(db, table, location, kargs):
             index = [i for i, k in enumerate(parts) if k.startswith(partition_keys[0]['Name'] + '=')][0]
         except Exception:
             print('Skip {}'.format(partition_url))
+            continue
         parts = parts[index:]
         partition_values = []
         for i, k in enumerate(partition_keys):
-            if parts[i].startswith(k['Name'] + '='):
+            if i < len(parts) and parts[i].startswith(k['Name'] + '='):
                 partition_values.append(parts[i].split('=', 1)[1])
         if len(partition_values) != len(partition_keys):
             print('Skip {}'.format(partition_url))
-        # Add partition
+            continue
+        if tuple(partition_values) in existing:
+            print('Partition [{}] already exists'.format(path))
+            continue
         partition_input = {
             'Values': partition_values,
             'StorageDescriptor': {
@@ -434,11 +1299,31 @@ def add_partitions_by_location(db, table, location, kargs):
                 'SerdeInfo': serde_info,
             },
         }
-        try:
-            glue.create_partition(DatabaseName=db, TableName=table, PartitionInput=partition_input)
-            print('Partition [{}] added'.format(path))
-        except glue.exceptions.AlreadyExistsException:
-            print('Partition [{}] already exists'.format(path))
+        partitions.append((path, partition_input))
+    # Add partitions, MAX_BATCH_CREATE_PARTITIONS per request
+    batches = [
+        partitions[i : i + MAX_BATCH_CREATE_PARTITIONS] for i in range(0, len(partitions), MAX_BATCH_CREATE_PARTITIONS)
+    ]
+
+    def create_partitions(batch):
+        response = glue.batch_create_partition(
+            DatabaseName=db,
+            TableName=table,
+            PartitionInputList=[partition_input for _, partition_input in batch],
+        )
+        return batch, {tuple(x['PartitionValues']): x['ErrorDetail'] for x in response.get('Errors', [])}
+
+    # the requests are sent concurrently, the results are printed in order
+    with ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS) as executor:
+        for batch, errors in executor.map(create_partitions, batches):
+            for path, partition_input in batch:
+                error = errors.get(tuple(partition_input['Values']))
+                if error is None:
+                    print('Partition [{}] added'.format(path))
+                elif error.get('ErrorCode') == 'AlreadyExistsException':
+                    print('Partition [{}] already exists'.format(path))
+                else:
+                    print('Partition [{}] not added: {}'.format(path, error.get('ErrorMessage')))
 
 
 def add_partition(db, table, kargs):
@@ -448,7 +1333,7 @@ def add_partition(db, table, kargs):
     if 'location' in kargs:
         del kargs['location']
     # Get glue table
-    glue_table = glue.get_table(DatabaseName=db, Name=table)
+    glue_table = get_table(db, table)
     # Check partition keys
     partition_keys = glue_table['Table']['PartitionKeys']
     partition_values = get_partition_values(kargs, partition_keys)
@@ -486,7 +1371,7 @@ def delete_partition(db, table, kargs):
     "Deletes a Glue partition"
     glue = get_glue()
     # Get glue table
-    glue_table = glue.get_table(DatabaseName=db, Name=table)
+    glue_table = get_table(db, table)
     # Check partition keys
     partition_keys = glue_table['Table']['PartitionKeys']
     partition_values = get_partition_values(kargs, partition_keys)
@@ -500,27 +1385,34 @@ def delete_partition(db, table, kargs):
 Table = namedtuple('Table', ['table_name', 'database_name'])
 
 
-def list_tables():
+def iter_tables():
+    "Yield the Glue tables, fetching the pages on demand"
     glue = get_glue()
-    response = glue.search_tables()
-    tables = []
-    while response:
+    kargs = {'MaxResults': MAX_SEARCH_TABLES_PAGE_SIZE}
+    while True:  # search_tables can't be paginated by botocore
+        response = glue.search_tables(**kargs)
         for table in response['TableList']:
-            tables.append(Table(table_name=table['Name'], database_name=table['DatabaseName']))
-        if response.get('NextToken'):
-            response = glue.search_tables(NextToken=response.get('NextToken'))
-        else:
-            response = None
-    return tables
+            yield Table(table_name=table['Name'], database_name=table['DatabaseName'])
+        if not response.get('NextToken'):
+            return
+        kargs['NextToken'] = response['NextToken']
+
+
+def list_tables():
+    return list(iter_tables())
 
 
 _cmds = []
+_cmds_map = {}  # command names and aliases -> functions
 
 
 def cmd(f):
     "Command decorator"
     f.cmd = f.__name__[4:] if f.__name__.startswith('cmd_') else f.__name__
     _cmds.append(f)
+    _cmds_map[f.cmd] = f
+    for name in getattr(f, 'aliases', None) or []:
+        _cmds_map[name] = f
     return f
 
 
@@ -528,14 +1420,8 @@ def alias(*aliases):
     "Command alias decorator - accept a aliases as arguments"
 
     def wrap(f):
-        def wrapped_f(*args, **kargs):
-            f(*args, **kargs)
-
-        wrapped_f.__name__ = f.__name__
-        wrapped_f.usage = getattr(f, 'usage', None)
-        wrapped_f.__doc__ = getattr(f, '__doc__', None)
-        wrapped_f.aliases = aliases
-        return wrapped_f
+        f.aliases = aliases
+        return f
 
     return wrap
 
@@ -544,33 +1430,20 @@ def usage(usage):
     "Command usage decorator"
 
     def wrap(f):
-        def wrapped_f(*args, **kargs):
-            f(*args, **kargs)
-
-        wrapped_f.__name__ = f.__name__
-        wrapped_f.usage = usage
-        wrapped_f.aliases = getattr(f, 'aliases', None)
-        wrapped_f.__doc__ = getattr(f, '__doc__', None)
-        return wrapped_f
+        f.usage = usage
+        parse_usage(usage)  # parse the usage line once, at import time
+        return f
 
     return wrap
 
 
-def this_fn():
-    "Return the caller function"
-    caller = currentframe().f_back
-    func_name = getframeinfo(caller)[2]
-    return caller.f_back.f_locals.get(func_name, caller.f_globals.get(func_name))
-
-
+@functools.lru_cache(maxsize=None)
 def parse_usage(usage):
-    "Parse usage help line"
-    usage = usage.split('\n')[0].split()
+    "Parse usage help line (the result is cached, the usage lines are static)"
     required = []
     optionals = []
     arguments = {}
-    while usage:
-        item = usage.pop(0)
+    for item in usage.split('\n')[0].split():
         if not item.startswith('['):
             required.append(item)
         else:
@@ -584,47 +1457,43 @@ def parse_usage(usage):
                     arguments[item] = str
                 else:
                     arguments[item] = bool
-    return required, optionals, arguments
+    return tuple(required), tuple(optionals), arguments
 
 
 def parse_args(args, usage, defaults=None):
     "Parse command lines arguments"
     required, optionals, arguments = parse_usage(usage)
+    required = deque(required)
+    optionals = deque(optionals)
     result = []
-    kargs = dict(defaults or {})
-    opt = None
-    if args:
-        args.pop(0)  # args[0] is the command
-    while args:
-        arg = args.pop(0)
-        if opt is not None:  # arguments value
-            value = arg
-            kargs[opt] = value
-            opt = None
-        elif required:  # required positional argument
+    kargs = {} if defaults is None else dict(defaults)
+    args = iter(args or [])
+    next(args, None)  # args[0] is the command
+    for arg in args:
+        if required:  # required positional argument
             result.append(arg)
-            required.pop(0)
+            required.popleft()
         elif optionals and arg[0] != '-':  # optional positional argument
             result.append(arg)
-            optionals.pop(0)
+            optionals.popleft()
         elif "=" in arg:  # argument --key=value
-            (opt, next_arg) = arg.split("=", 1)
-            if not opt.startswith('--'):
+            (key, value) = arg.split("=", 1)
+            if not key.startswith('--'):
                 raise InvalidOption('invalid option: ' + arg)
-            opt = opt[2:]
-            args.insert(0, next_arg)
+            kargs[key[2:]] = value
         else:
             if not arg.startswith('--'):
                 raise InvalidOption('invalid option: ' + arg)
             t = arg[2:]
             if arguments.get(t) == bool:  # boolean arg
                 kargs['op_' + t] = True
-            else:
-                opt = t
-    if opt is not None:
-        raise InvalidOption('missing value for {0}'.format(opt))
+            else:  # argument value
+                try:
+                    kargs[t] = next(args)
+                except StopIteration:
+                    raise InvalidOption('missing value for {0}'.format(t))
     if required:  # check missing required values
-        raise InvalidOption('missing {}'.format(required.pop(0)))
+        raise InvalidOption('missing {}'.format(required.popleft()))
     while optionals:  # add missing optional values
         result.append(None)
         optionals.pop()
@@ -644,19 +1513,17 @@ def cmd_list_crawlers(argv):
     Example: list_crawlers 'test*' --noheaders
     """
     default_args = {'op_noheaders': False}
-    pattern, kargs = parse_args(argv, this_fn().usage, default_args)
+    pattern, kargs = parse_args(argv, cmd_list_crawlers.usage, default_args)
     header = not kargs['op_noheaders']
-    fmt = '{Name:40} {State:10} {CrawlElapsedTime}'
     if header:
-        print(fmt.format(Name='Name', State='Status', CrawlElapsedTime=''))
-        print('-' * 70)
-    for crawler in list_crawlers(full=True):
-        if not pattern or fnmatch.fnmatch(crawler['Name'], pattern):
-            if crawler['State'] == 'RUNNING':
-                crawler['CrawlElapsedTime'] = format_time(crawler['CrawlElapsedTime'] / 1000)
-            else:
-                crawler['CrawlElapsedTime'] = ''
-            print(fmt.format(**crawler))
+        print(CRAWLER_HEADER)
+        print(HEADER_SEPARATOR)
+    for crawler in iter_crawlers(full=True, pattern=pattern):
+        if crawler['State'] == 'RUNNING':
+            elapsed_time = format_time(crawler['CrawlElapsedTime'] / 1000)
+        else:
+            elapsed_time = ''
+        print(CRAWLER_FMT.format(crawler['Name'], crawler['State'], elapsed_time))
 
 
 @cmd
@@ -668,16 +1535,14 @@ def cmd_list_jobs(argv):
     Example: list_jobs 'test*'
     """
     default_args = {'op_noheaders': False}
-    pattern, kargs = parse_args(argv, this_fn().usage, default_args)
+    pattern, kargs = parse_args(argv, cmd_list_jobs.usage, default_args)
     header = not kargs['op_noheaders']
-    fmt = '{Name:40} {AllocatedCapacity:8}  {MaxConcurrentRuns:10}'
     if header:
-        print(fmt.format(Name='Name', AllocatedCapacity='Capacity', MaxConcurrentRuns='Max concurrent'))
-        print('-' * 70)
-    for job in list_jobs(full=True):
-        if not pattern or fnmatch.fnmatch(job['Name'], pattern):
-            job['MaxConcurrentRuns'] = job.get('ExecutionProperty', {}).get('MaxConcurrentRuns', '-')
-            print(fmt.format(**job))
+        print(JOB_HEADER)
+        print(HEADER_SEPARATOR)
+    for job in iter_jobs(full=True, pattern=pattern):
+        max_concurrent_runs = job.get('ExecutionProperty', {}).get('MaxConcurrentRuns', '-')
+        print(JOB_FMT.format(job['Name'], job.get('AllocatedCapacity', '-'), max_concurrent_runs))
 
 
 @cmd
@@ -689,22 +1554,22 @@ def cmd_run_crawler(argv):
     Example: run_crawler my_usage_crawler --async
     """
     default_args = {'op_async': False, 'timeout': DEFAULT_CRAWLER_TIMEOUT}
-    name, kargs = parse_args(argv, this_fn().usage, default_args)
+    name, kargs = parse_args(argv, cmd_run_crawler.usage, default_args)
     run_crawler(name, **kargs)
 
 
 @cmd
 @alias('lsr')
-@usage('[job_name] [--lines=num] [--noheaders]')
+@usage('[job_name] [--lines=num] [--noheaders] [--json]')
 def cmd_list_runs(argv):
     """
     Print Glue jobs history.
     Example: list_runs my_batch_job --lines 10
     """
-    default_args = {'lines': None, 'op_noheaders': False}
-    name, kargs = parse_args(argv, this_fn().usage, default_args)
+    default_args = {'lines': None, 'op_noheaders': False, 'op_json': False}
+    name, kargs = parse_args(argv, cmd_list_runs.usage, default_args)
     header = not kargs['op_noheaders']
-    print_job_runs(name, lines=kargs['lines'], header=header)
+    print_job_runs(name, lines=kargs['lines'], header=header, output_json=kargs['op_json'])
 
 
 @cmd
@@ -716,8 +1581,11 @@ def cmd_run_job(argv):
     Example: cmd_run_job --DATALAKE_BUCKET=test --THE_DATE=20191112 --HOUR=15
     """
     default_args = {'op_async': False}
-    name, kargs = parse_args(argv, this_fn().usage, default_args)
-    return 0 if run_job(name, **kargs) else 0
+    name, kargs = parse_args(argv, cmd_run_job.usage, default_args)
+    # only --async, --delay and --timeout are gluettalax options,
+    # all the other --params (e.g. --queue_url, --min_delay) are passed to the job
+    options = {key: kargs.pop(key) for key in ('op_async', 'delay', 'timeout') if key in kargs}
+    return 0 if Job(name, **options).run(**kargs) else 0
 
 
 @cmd
@@ -729,17 +1597,18 @@ def cmd_list_partitions(argv):
     Example: list_partitions datalake usage
     """
     default_args = {'op_noheaders': False}
-    db, table, pattern, kargs = parse_args(argv, this_fn().usage, default_args)
+    db, table, pattern, kargs = parse_args(argv, cmd_list_partitions.usage, default_args)
     header = not kargs['op_noheaders']
     result = list_partitions(db, table, header)
     fmt = '  '.join(['{:%d}' % x for x in result.max_lengths]) + '  {}'
     # Print header
     if header:
         print(fmt.format(*(result.partition_keys + ['Location'])))
-        print('-' * 70)
+        print(HEADER_SEPARATOR)
     # Print partitions
+    match = compile_pattern(pattern)
     for line in result.data:
-        if not pattern or any([fnmatch.fnmatch(x, pattern) for x in line]):
+        if not pattern or any(match(x) for x in line):
             print(fmt.format(*line))
 
 
@@ -751,7 +1620,7 @@ def cmd_add_partition(argv):
     Create a new Glue partition.
     Example: add_partition datalake usage --year=2019 --month=09
     """
-    db, table, kargs = parse_args(argv, this_fn().usage)
+    db, table, kargs = parse_args(argv, cmd_add_partition.usage)
     add_partition(db, table, kargs)
     print('Partition added')
 
@@ -763,7 +1632,7 @@ def cmd_add_partitions(argv):
     Create new Glue partitions in a given location.
     Example: add_partition datalake usage s3://example/usage/year=2020/month=10
     """
-    db, table, location, kargs = parse_args(argv, this_fn().usage)
+    db, table, location, kargs = parse_args(argv, cmd_add_partitions.usage)
     add_partitions_by_location(db, table, location, kargs)
 
 
@@ -775,7 +1644,7 @@ def cmd_del_partition(argv):
     Delete a Glue partition.
     Example: del_partition datalake usage --year=2019 --month=09
     """
-    db, table, kargs = parse_args(argv, this_fn().usage)
+    db, table, kargs = parse_args(argv, cmd_del_partition.usage)
     delete_partition(db, table, kargs)
     print('Partition deleted')
 
@@ -789,14 +1658,15 @@ def cmd_list_tables(argv):
     Example: list_tables 'test*' --noheaders
     """
     default_args = {'op_noheaders': False}
-    pattern, kargs = parse_args(argv, this_fn().usage, default_args)
+    pattern, kargs = parse_args(argv, cmd_list_tables.usage, default_args)
     header = not kargs['op_noheaders']
     fmt = '{database_name:40} {table_name}'
     if header:
         print(fmt.format(database_name='Database', table_name='Name'))
-        print('-' * 70)
-    for table in list_tables():
-        if not pattern or fnmatch.fnmatch(table.table_name, pattern):
+        print(HEADER_SEPARATOR)
+    match = compile_pattern(pattern)
+    for table in iter_tables():
+        if match(table.table_name):
             print(fmt.format(database_name=table.database_name, table_name=table.table_name))
 
 
@@ -807,7 +1677,7 @@ def cmd_help(argv):
     """
     Display information about commands.
     """
-    command, kargs = parse_args(argv, this_fn().usage)
+    command, kargs = parse_args(argv, cmd_help.usage)
     if command:
         f = lookup_cmd(command)
         usage_text = getattr(f, 'usage', '')
@@ -824,15 +1694,16 @@ def cmd_help(argv):
             print('')
         print('Command aliases:')
         for f in _cmds:
-            aliases = sorted(getattr(f, 'aliases') or [])
+            aliases = sorted(getattr(f, 'aliases', None) or [])
             if aliases and f.cmd != 'help':
                 print(' {} -> {}'.format(' '.join(aliases), f.cmd))
 
 
 def lookup_cmd(cmd):
-    for f in _cmds:
-        if cmd == getattr(f, 'cmd') or cmd in (getattr(f, 'aliases') or []):
-            return f
+    try:
+        return _cmds_map[cmd]
+    except KeyError:
+        pass
     raise GluettalaxCommandNotFound('Invalid command "{}"; use "help" for a list.'.format(cmd))
 
 
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+#
+#
+# MIT License
+#
+# Copyright (c) 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import time
+import asyncio
+import pytest
+from gluettalax import Backoff, GluettalaxException, JobTimeout, RateLimiter, create_glue, wait_for_state_async
+
+
+def test_backoff_bounds():
+    backoff = Backoff(60, 0.5, 10, JobTimeout)
+    delays = [backoff.next_delay() for _ in range(100)]
+    assert all(0.5 <= delay <= 10 for delay in delays)
+    assert delays[-1] > 0.5
+    backoff.reset()
+    assert backoff.next_delay() <= 1.5
+
+
+def test_backoff_timeout():
+    backoff = Backoff(-1, 0.5, 10, JobTimeout)
+    with pytest.raises(JobTimeout):
+        backoff.next_delay()
+
+
+def test_wait_for_state_async():
+    states = iter(['STARTING', 'RUNNING', 'RUNNING', 'SUCCEEDED'])
+    backoff = Backoff(10, 0.01, 0.02, JobTimeout)
+    assert asyncio.run(wait_for_state_async(lambda: next(states), lambda x: x == 'SUCCEEDED', backoff)) == 'SUCCEEDED'
+
+
+def test_wait_for_state_async_hanging():
+    def get_state():
+        time.sleep(0.5)  # hanging API call
+        return 'RUNNING'
+
+    backoff = Backoff(0.1, 0.01, 0.02, JobTimeout)
+    with pytest.raises(JobTimeout):
+        asyncio.run(wait_for_state_async(get_state, lambda x: x == 'SUCCEEDED', backoff))
+
+
+def test_rate_limiter():
+    limiter = RateLimiter(100, burst=5)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.monotonic() - start < 0.04
+    for _ in range(10):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.parametrize('max_qps', ['0', '-1', 'x', 'nan'])
+def test_invalid_max_qps(monkeypatch, max_qps):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'eu-west-1')
+    monkeypatch.setenv('GLUE_MAX_QPS', max_qps)
+    with pytest.raises(GluettalaxException):
+        create_glue()
@@ -25,9 +25,23 @@
 #
 
 import os
+import asyncio
 import pytest
+from botocore.stub import Stubber
 from moto import mock_glue
-from gluettalax import gluettalax, get_glue
+from gluettalax import (
+    gluettalax,
+    Crawler,
+    get_glue,
+    get_crawlers_states,
+    list_crawlers,
+    run_crawler,
+    run_crawler_async,
+    run_crawlers_async,
+    run_crawlers,
+    CrawlerNotFound,
+    CrawlerTimeout,
+)
 
 
 @pytest.fixture(scope='function')
@@ -69,6 +83,13 @@ def test_list_crawlers(aws_credentials):
     create_test_crawler(glue)
     assert gluettalax('list_crawlers') == 0
     assert gluettalax('list_crawlers', 'test*') == 0
+    assert gluettalax('list_crawlers', 'test') == 0
+    assert list_crawlers() == ['test']
+    assert list_crawlers(pattern='t?st') == ['test']
+    assert list_crawlers(pattern='x*') == []
+    assert [x['Name'] for x in list_crawlers(full=True, pattern='te*')] == ['test']
+    assert [x['Name'] for x in list_crawlers(full=True, pattern='test')] == ['test']
+    assert list_crawlers(full=True, pattern='missing') == []
 
 
 @mock_glue
@@ -76,3 +97,81 @@ def test_run_crawler(aws_credentials):
     glue = get_glue()
     create_test_crawler(glue)
     assert gluettalax('run_crawler', 'test', '--async') == 0
+
+
+@mock_glue
+def test_run_crawler_timeout(aws_credentials):
+    glue = get_glue()
+    create_test_crawler(glue)
+    # the mocked crawler never goes back to the READY state
+    assert gluettalax('run_crawler', 'test', '--timeout=0') == 1
+
+
+@mock_glue
+def test_run_crawlers_async(aws_credentials):
+    glue = get_glue()
+    create_test_crawler(glue)
+    asyncio.run(run_crawlers_async(['test'], op_async=True))
+    assert glue.get_crawler(Name='test')['Crawler']['State'] == 'RUNNING'
+    assert get_crawlers_states(['test']) == {'test': 'RUNNING'}
+    # the mocked crawler never goes back to the READY state
+    with pytest.raises(CrawlerTimeout):
+        asyncio.run(run_crawlers_async(['test'], timeout=0))
+    with pytest.raises(CrawlerNotFound):
+        get_crawlers_states(['test', 'missing'])
+
+
+@mock_glue
+def test_run_crawlers(aws_credentials):
+    glue = get_glue()
+    create_test_crawler(glue)
+    glue.create_crawler(Name='test2', Role='role', Targets={'S3Targets': [{'Path': 's3://bucket/path'}]})
+    run_crawlers(['test', 'test2'], op_async=True)
+    assert get_crawlers_states(['test', 'test2']) == {'test': 'RUNNING', 'test2': 'RUNNING'}
+
+
+def crawler(name, state):
+    return {'Name': name, 'State': state}
+
+
+def test_run_crawlers_max_parallel(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        # one crawler at a time, the next crawler is started when the previous one is READY again
+        for name, polls in (('a', ['READY']), ('b', ['RUNNING', 'READY']), ('c', ['READY'])):
+            stubber.add_response('get_crawler', {'Crawler': crawler(name, 'READY')}, {'Name': name})
+            stubber.add_response('start_crawler', {}, {'Name': name})
+            for state in polls:
+                response = {'Crawlers': [crawler(name, state)]}
+                stubber.add_response('batch_get_crawlers', response, {'CrawlerNames': [name]})
+        run_crawlers(['a', 'b', 'c'], max_parallel=1, delay=0.01, min_delay=0.01)
+        stubber.assert_no_pending_responses()
+
+
+@mock_glue
+def test_run_crawler_async(aws_credentials):
+    glue = get_glue()
+    create_test_crawler(glue)
+    asyncio.run(run_crawler_async('test', op_async=True))
+    assert glue.get_crawler(Name='test')['Crawler']['State'] == 'RUNNING'
+
+
+@mock_glue
+def test_run_crawler_rerun(aws_credentials):
+    glue = get_glue()
+    create_test_crawler(glue)
+    run_crawler('test', op_async=True)
+    # rerun waits for the running crawler (never READY in the mock) before restarting it
+    with pytest.raises(CrawlerTimeout):
+        run_crawler('test', rerun=True, timeout=0, op_async=True)
+    # without rerun, the running crawler is not restarted
+    run_crawler('test', op_async=True)
+
+
+def test_start_crawler_running(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        # e.g. the start request retried after a read timeout
+        stubber.add_client_error('start_crawler', 'CrawlerRunningException', expected_params={'Name': 'test'})
+        Crawler('test').start()
+        stubber.add_client_error('start_crawler', 'EntityNotFoundException', expected_params={'Name': 'missing'})
+        with pytest.raises(CrawlerNotFound):
+            Crawler('missing').start()
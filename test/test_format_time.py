@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+#
+#
+# MIT License
+#
+# Copyright (c) 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+from gluettalax import format_time
+
+
+def test_zero():
+    assert format_time() == '0s'
+    assert format_time(0) == '0s'
+
+
+def test_seconds():
+    assert format_time(5) == '5s'
+    assert format_time(59.9) == '59s'
+
+
+def test_minutes():
+    assert format_time(60) == '1m'
+    assert format_time(65) == '1m 5s'
+
+
+def test_hours():
+    assert format_time(3600) == '1h'
+    assert format_time(3661) == '1h 1m 1s'
+
+
+def test_days():
+    assert format_time(86400) == '1d'
+    assert format_time(86405) == '1d 5s'
+    assert format_time(2 * 86400 + 3 * 3600 + 4 * 60 + 5) == '2d 3h 4m 5s'
+
+
+def test_negative():
+    assert format_time(-65) == '-1m -5s'
+    assert format_time(-0.5) == '-0s'
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+#
+#
+# MIT License
+#
+# Copyright (c) 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import json
+import datetime
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+import pytest
+from botocore.stub import Stubber
+from moto import mock_glue, mock_sqs
+from gluettalax import (
+    gluettalax,
+    get_glue,
+    run_job,
+    run_jobs_async,
+    list_jobs,
+    iter_jobs,
+    iter_jobs_async,
+    list_runs,
+    iter_runs,
+    print_runs_json,
+    Job,
+)
+
+
+@pytest.fixture(scope='function')
+def aws_credentials():
+    "Mocked AWS Credentials"
+    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
+    os.environ['AWS_SESSION_TOKEN'] = 'testing'
+    os.environ['AWS_DEFAULT_REGION'] = 'eu-west-1'
+
+
+def create_test_job(glue):
+    assert glue.get_jobs()['Jobs'] == []
+    glue.create_job(
+        Name='test',
+        Role='role',
+        Command={
+            'Name': 'glueetl',
+            'ScriptLocation': 's3://bucket/script.py',
+        },
+        Timeout=10,
+    )
+    assert glue.get_jobs()['Jobs'] != []
+
+
+@mock_glue
+def test_list_jobs(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    assert list_jobs() == ['test']
+    assert [job['Name'] for job in list_jobs(full=True)] == ['test']
+    assert [job['Name'] for job in list_jobs(full=True, pattern='te*')] == ['test']
+    assert list_jobs(full=True, pattern='x*') == []
+    assert list_jobs(pattern='?est') == ['test']
+    assert list(iter_jobs(pattern='?est', limit=1)) == ['test']
+    assert list_jobs(pattern='test') == ['test']
+    assert list_jobs(pattern='missing') == []
+    assert [job['Name'] for job in list_jobs(full=True, pattern='test')] == ['test']
+    assert gluettalax('list_jobs', 'test*') == 0
+
+
+@mock_glue
+def test_run_job(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    assert run_job('test', delay=0.01, THE_DATE='20191112') is True
+
+
+@mock_glue
+def test_get_run(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    job = Job('test')
+    job_run_id = job.start(THE_DATE='20191112')
+    job_run = job.get_run(job_run_id)
+    assert job_run['Id'] == job_run_id
+    assert job.get_run_state(job_run_id) == job_run['JobRunState']
+
+
+@mock_glue
+def test_run_jobs_async(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    assert asyncio.run(run_jobs_async(['test', 'test'], delay=0.01)) == [True, True]
+    assert asyncio.run(run_jobs_async(iter_jobs_async(pattern='te*'), delay=0.01)) == [True]
+
+
+@mock_glue
+def test_run_job_async(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    assert gluettalax('run_job', 'test', '--async', '--THE_DATE=20191112') == 0
+
+
+def test_run_job_cmd_arguments(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        stubber.add_response('get_job', {'Job': {'Name': 'stubbed', 'Timeout': 10}}, {'JobName': 'stubbed'})
+        stubber.add_response(
+            'start_job_run',
+            {'JobRunId': 'jr_1'},
+            {'JobName': 'stubbed', 'Timeout': 10, 'Arguments': {'--queue_url': 'https://x/q', '--other': '1'}},
+        )
+        # --queue_url is a job argument, not the SQS queue of the events
+        assert gluettalax('run_job', 'stubbed', '--async', '--queue_url=https://x/q', '--other=1') == 0
+        stubber.assert_no_pending_responses()
+        # --min_delay is a job argument, not the polling min delay
+        stubber.add_response(
+            'start_job_run',
+            {'JobRunId': 'jr_2'},
+            {'JobName': 'stubbed', 'Timeout': 10, 'Arguments': {'--min_delay': '1'}},
+        )
+        assert gluettalax('run_job', 'stubbed', '--async', '--min_delay=1') == 0
+        stubber.assert_no_pending_responses()
+
+
+@mock_glue
+def test_run_job_not_found(aws_credentials):
+    assert gluettalax('run_job', 'missing') == 1
+
+
+@mock_glue
+@mock_sqs
+def test_wait_events(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    sqs = boto3.client('sqs')
+    queue_url = sqs.create_queue(QueueName='glue-events')['QueueUrl']
+    for job_run_id, state in (('jr_other', 'FAILED'), ('jr_test', 'RUNNING'), ('jr_test', 'SUCCEEDED')):
+        sqs.send_message(
+            QueueUrl=queue_url,
+            MessageBody=json.dumps(
+                {
+                    'source': 'aws.glue',
+                    'detail-type': 'Glue Job State Change',
+                    'detail': {'jobName': 'test', 'jobRunId': job_run_id, 'state': state},
+                }
+            ),
+        )
+    job = Job('test', queue_url=queue_url)
+    assert job.wait_events('jr_test') is True
+
+
+@mock_glue
+@mock_sqs
+def test_wait_events_many_waiters(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    sqs = boto3.client('sqs')
+    queue_url = sqs.create_queue(QueueName='glue-events-many')['QueueUrl']
+    states = {'jr_{}'.format(i): 'FAILED' if i % 2 else 'SUCCEEDED' for i in range(5)}
+    for job_run_id, state in states.items():
+        sqs.send_message(
+            QueueUrl=queue_url,
+            MessageBody=json.dumps({'detail': {'jobName': 'test', 'jobRunId': job_run_id, 'state': state}}),
+        )
+    job = Job('test', queue_url=queue_url)
+    with ThreadPoolExecutor(max_workers=len(states)) as executor:
+        results = list(executor.map(job.wait_events, reversed(list(states))))
+    assert results == [state == 'SUCCEEDED' for state in reversed(list(states.values()))]
+    # the received events are deleted
+    assert 'Messages' not in sqs.receive_message(QueueUrl=queue_url)
+
+
+@mock_glue
+@mock_sqs
+def test_wait_events_async(aws_credentials):
+    glue = get_glue()
+    create_test_job(glue)
+    sqs = boto3.client('sqs')
+    queue_url = sqs.create_queue(QueueName='glue-events-async')['QueueUrl']
+    job_run_ids = ['jr_{}'.format(i) for i in range(6)]
+
+    def send_events():
+        for job_run_id in job_run_ids:
+            sqs.send_message(
+                QueueUrl=queue_url,
+                MessageBody=json.dumps({'detail': {'jobName': 'test', 'jobRunId': job_run_id, 'state': 'SUCCEEDED'}}),
+            )
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        # more waiters than executor workers, the waiters don't hold the executor threads
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=2))
+        job = Job('test', timeout=10, queue_url=queue_url)
+        waiters = [asyncio.ensure_future(job.wait_events_async(job_run_id)) for job_run_id in job_run_ids]
+        await asyncio.sleep(0.2)
+        # the events are sent after the waiters are waiting
+        await loop.run_in_executor(None, send_events)
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(main()) == [True] * len(job_run_ids)
+
+
+def job_run(i, state='SUCCEEDED'):
+    # the runs are sorted by start time, newest first: jr_i is started at 15:00 - i hours
+    started_on = datetime.datetime(2019, 11, 12, 15, 0, 0, tzinfo=datetime.timezone.utc) - datetime.timedelta(hours=i)
+    return {'Id': 'jr_{}'.format(i), 'JobName': 'test', 'JobRunState': state, 'StartedOn': started_on}
+
+
+def test_list_runs_page_size(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        # not filtered, fetch only the requested runs
+        stubber.add_response('get_job_runs', {'JobRuns': [job_run(1)]}, {'JobName': 'test', 'MaxResults': 1})
+        assert [x['Id'] for x in list_runs('test', lines=1)] == ['jr_1']
+        # filtered, fetch full pages
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(1), job_run(2)], 'NextToken': 'next'},
+            {'JobName': 'test', 'MaxResults': 200},
+        )
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(3), job_run(4, 'FAILED'), job_run(5, 'FAILED')]},
+            {'JobName': 'test', 'MaxResults': 200, 'NextToken': 'next'},
+        )
+        assert [x['Id'] for x in list_runs('test', lines=1, include_succeeded=False)] == ['jr_4']
+        stubber.assert_no_pending_responses()
+
+
+def test_list_runs_since(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        # the cutoff is in the first page, the second page is not fetched
+        since = job_run(2)['StartedOn']
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(1), job_run(2), job_run(3)], 'NextToken': 'next'},
+            {'JobName': 'test', 'MaxResults': 200},
+        )
+        assert [x['Id'] for x in iter_runs('test', since=since)] == ['jr_1', 'jr_2']
+        stubber.assert_no_pending_responses()
+        # the cutoff is in the second page, the third page is not fetched
+        since = job_run(3)['StartedOn'] - datetime.timedelta(minutes=30)
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(1), job_run(2)], 'NextToken': 'page2'},
+            {'JobName': 'test', 'MaxResults': 200},
+        )
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(3), job_run(4)], 'NextToken': 'page3'},
+            {'JobName': 'test', 'MaxResults': 200, 'NextToken': 'page2'},
+        )
+        assert [x['Id'] for x in iter_runs('test', since=since)] == ['jr_1', 'jr_2', 'jr_3']
+        stubber.assert_no_pending_responses()
+
+
+def test_job_get_runs(aws_credentials):
+    with Stubber(get_glue()) as stubber:
+        since = job_run(3)['StartedOn']
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(1), job_run(2)], 'NextToken': 'page2'},
+            {'JobName': 'test', 'MaxResults': 2},
+        )
+        job = Job('test', timeout=60)
+        assert [x['Id'] for x in job.get_runs(since=since, max_items=2)] == ['jr_1', 'jr_2']
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(1), job_run(2)], 'NextToken': 'page2'},
+            {'JobName': 'test', 'MaxResults': 3},
+        )
+        stubber.add_response(
+            'get_job_runs',
+            {'JobRuns': [job_run(3), job_run(4)]},
+            {'JobName': 'test', 'MaxResults': 3, 'NextToken': 'page2'},
+        )
+        assert [x['Id'] for x in job.get_runs(since=since, max_items=3)] == ['jr_1', 'jr_2', 'jr_3']
+        stubber.assert_no_pending_responses()
+
+
+def test_print_runs_json(capsys):
+    started_on = datetime.datetime(2019, 11, 12, 15, 0, 0)
+    job_runs = ({'Id': 'jr_{}'.format(i), 'JobName': 'test', 'StartedOn': started_on} for i in range(3))
+    print_runs_json(job_runs)
+    result = json.loads(capsys.readouterr().out)
+    assert [x['Id'] for x in result] == ['jr_0', 'jr_1', 'jr_2']
+    assert result[0]['StartedOn'] == str(started_on)
+    print_runs_json([])
+    assert json.loads(capsys.readouterr().out) == []
+
+
+def test_list_runs_json_not_found(aws_credentials, capsys):
+    with Stubber(get_glue()) as stubber:
+        stubber.add_client_error('get_job_runs', 'EntityNotFoundException')
+        assert gluettalax('list_runs', 'missing', '--json') != 0
+    # only the error message, without the opening bracket
+    assert capsys.readouterr().out == 'Job missing not found\n'
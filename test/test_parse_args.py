@@ -133,3 +133,12 @@ def test_parse_ok_3_defaults():
     args = ['run_job', 'NAME']
     name, kargs = parse_args(args, help_text_3, default_args_3)
     assert name == 'NAME'
+
+
+def test_parse_args_not_modified():
+    args = ['run_job', 'NAME', '--a=1', '--b', '2']
+    name, kargs = parse_args(args, help_text_3, default_args_3)
+    assert name == 'NAME'
+    assert kargs['a'] == '1'
+    assert kargs['b'] == '2'
+    assert args == ['run_job', 'NAME', '--a=1', '--b', '2']
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+#
+# MIT License
+#
+# Copyright (c) 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+import os
+import boto3
+import pytest
+from moto import mock_glue, mock_s3
+import gluettalax
+from gluettalax import (
+    get_glue,
+    get_table,
+    add_partitions_by_location,
+    list_partitions,
+    invalidate_table_cache,
+    TableNotFound,
+)
+
+
+@pytest.fixture(scope='function')
+def aws_credentials():
+    "Mocked AWS Credentials"
+    os.environ['AWS_ACCESS_KEY_ID'] = 'testing'
+    os.environ['AWS_SECRET_ACCESS_KEY'] = 'testing'
+    os.environ['AWS_SECURITY_TOKEN'] = 'testing'
+    os.environ['AWS_SESSION_TOKEN'] = 'testing'
+    os.environ['AWS_DEFAULT_REGION'] = 'eu-west-1'
+    invalidate_table_cache()
+
+
+def create_test_table(glue):
+    glue.create_database(DatabaseInput={'Name': 'datalake'})
+    glue.create_table(
+        DatabaseName='datalake',
+        TableInput={
+            'Name': 'usage',
+            'StorageDescriptor': {
+                'Location': 's3://bucket/usage/',
+                'InputFormat': 'org.apache.hadoop.mapred.TextInputFormat',
+                'OutputFormat': 'org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat',
+                'SerdeInfo': {},
+            },
+            'PartitionKeys': [{'Name': 'year', 'Type': 'string'}],
+        },
+    )
+
+
+@mock_glue
+def test_get_table(aws_credentials):
+    glue = get_glue()
+    create_test_table(glue)
+    assert get_table('datalake', 'usage')['Table']['Name'] == 'usage'
+    glue.delete_table(DatabaseName='datalake', Name='usage')
+    # the table metadata is cached, the callers get a copy
+    table = get_table('datalake', 'usage')
+    assert table['Table']['Name'] == 'usage'
+    table['Table']['Name'] = 'changed'
+    assert get_table('datalake', 'usage')['Table']['Name'] == 'usage'
+    invalidate_table_cache()
+    with pytest.raises(TableNotFound):
+        get_table('datalake', 'usage')
+
+
+@mock_glue
+def test_get_table_expired(aws_credentials, monkeypatch):
+    glue = get_glue()
+    create_test_table(glue)
+    assert get_table('datalake', 'usage')['Table']['Name'] == 'usage'
+    glue.delete_table(DatabaseName='datalake', Name='usage')
+    # the cache entry is expired
+    monkeypatch.setattr(gluettalax, 'TABLE_CACHE_TTL', -1)
+    with pytest.raises(TableNotFound):
+        get_table('datalake', 'usage')
+
+
+@mock_s3
+@mock_glue
+def test_add_partitions_by_location(aws_credentials, capsys):
+    glue = get_glue()
+    create_test_table(glue)
+    s3 = boto3.client('s3')
+    s3.create_bucket(Bucket='bucket', CreateBucketConfiguration={'LocationConstraint': 'eu-west-1'})
+    for key in ['usage/year=2019/a', 'usage/year=2019/b', 'usage/year=2020/a', 'usage/other/a']:
+        s3.put_object(Bucket='bucket', Key=key, Body=b'')
+    add_partitions_by_location('datalake', 'usage', 's3://bucket/usage/', {})
+    out = capsys.readouterr().out
+    assert 'Skip s3://bucket/usage/other/' in out
+    assert 'Partition [usage/year=2019] added' in out
+    assert 'Partition [usage/year=2020] added' in out
+    assert [row[0] for row in list_partitions('datalake', 'usage').data] == ['2019', '2020']
+    add_partitions_by_location('datalake', 'usage', 's3://bucket/usage/', {})
+    assert 'Partition [usage/year=2019] already exists' in capsys.readouterr().out
+    # empty location
+    add_partitions_by_location('datalake', 'usage', 's3://bucket/missing/', {})
+    assert capsys.readouterr().out == ''